@@ -1,14 +1,32 @@
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+import orjson
 import os
 import json
+import logging
 import threading
 import time
+from cachetools import LRUCache, TTLCache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from code_generator import CodeGenerator
 from github_manager import GitHubManager
 from evaluator import submit_to_evaluation
 
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson for request parsing and jsonify"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # Configuration - SET THESE IN ENVIRONMENT VARIABLES
 SECRET_CODE = os.getenv('SECRET_CODE', 'your-secret-here')
@@ -16,10 +34,23 @@ GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
 GITHUB_USERNAME = os.getenv('GITHUB_USERNAME')
 LLM_API_KEY = os.getenv('LLM_API_KEY')  # Groq, OpenAI, or Anthropic
 LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'groq')  # groq, openai, anthropic
+MAX_WORKERS = int(os.getenv('MAX_WORKERS', '8'))  # Concurrent background tasks
 
-# Simple in-memory storage (can be replaced with SQLite)
-tasks_db = {}
-processing_status = {}
+# Bounded pool of background workers for task processing; on interpreter
+# exit concurrent.futures waits for running and queued tasks to finish
+EXECUTOR = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='task')
+
+# Shared clients so connection pools stay warm across tasks.
+# GitHubManager hands each worker thread its own PyGithub client.
+GENERATOR = CodeGenerator(api_key=LLM_API_KEY, provider=LLM_PROVIDER) if LLM_API_KEY else None
+GH_MANAGER = GitHubManager(token=GITHUB_TOKEN, username=GITHUB_USERNAME) if GITHUB_TOKEN else None
+
+# Simple in-memory storage (can be replaced with SQLite), bounded so
+# finished tasks don't accumulate for the lifetime of the process.
+# cachetools caches are not thread-safe, so access goes through STORE_LOCK.
+tasks_db = LRUCache(maxsize=1024)
+processing_status = TTLCache(maxsize=4096, ttl=3600)
+STORE_LOCK = threading.Lock()
 
 def process_task_async(task_data):
     """Background task processor"""
@@ -28,46 +59,44 @@ def process_task_async(task_data):
     round_num = task_data['round']
     
     try:
-        processing_status[task_id] = {'status': 'processing', 'step': 'initializing'}
+        status = {'status': 'processing', 'step': 'initializing'}
+        with STORE_LOCK:
+            processing_status[task_id] = status
         
         # Step 1: Generate code using LLM
-        processing_status[task_id]['step'] = 'generating_code'
-        generator = CodeGenerator(
-            api_key=LLM_API_KEY,
-            provider=LLM_PROVIDER
-        )
+        status['step'] = 'generating_code'
+        if GENERATOR is None:
+            raise RuntimeError('LLM_API_KEY is not configured')
         
-        code_files = generator.generate_app(
+        code_files = GENERATOR.generate_app(
             brief=task_data['brief'],
             checks=task_data['checks'],
             attachments=task_data.get('attachments', [])
         )
         
         # Step 2: Create/Update GitHub repo
-        processing_status[task_id]['step'] = 'creating_repo'
-        gh_manager = GitHubManager(
-            token=GITHUB_TOKEN,
-            username=GITHUB_USERNAME
-        )
+        status['step'] = 'creating_repo'
+        if GH_MANAGER is None:
+            raise RuntimeError('GITHUB_TOKEN is not configured')
         
         repo_name = f"{task_id}"
         
         if round_num == 1:
             # Create new repo
-            repo_url, commit_sha, pages_url = gh_manager.create_repo(
+            repo_url, commit_sha, pages_url = GH_MANAGER.create_repo(
                 repo_name=repo_name,
                 files=code_files,
                 description=f"Project: {task_id}"
             )
         else:
             # Update existing repo
-            repo_url, commit_sha, pages_url = gh_manager.update_repo(
+            repo_url, commit_sha, pages_url = GH_MANAGER.update_repo(
                 repo_name=repo_name,
                 files=code_files
             )
         
         # Step 3: Submit to evaluation API
-        processing_status[task_id]['step'] = 'submitting_evaluation'
+        status['step'] = 'submitting_evaluation'
         submission_data = {
             'email': email,
             'task': task_id,
@@ -83,7 +112,7 @@ def process_task_async(task_data):
             data=submission_data
         )
         
-        processing_status[task_id] = {
+        result = {
             'status': 'completed' if success else 'failed',
             'step': 'done',
             'repo_url': repo_url,
@@ -93,18 +122,24 @@ def process_task_async(task_data):
             'timestamp': datetime.utcnow().isoformat()
         }
         
-        # Store in tasks_db
-        tasks_db[f"{email}_{task_id}_{round_num}"] = {
-            'task_data': task_data,
-            'result': processing_status[task_id]
-        }
+        # Store in tasks_db, keeping identifiers rather than the full
+        # task_data so attachments are not retained after completion
+        with STORE_LOCK:
+            processing_status[task_id] = result
+            tasks_db[f"{email}_{task_id}_{round_num}"] = {
+                'email': email,
+                'task': task_id,
+                'round': round_num,
+                'result': result
+            }
         
     except Exception as e:
-        processing_status[task_id] = {
-            'status': 'error',
-            'error': str(e),
-            'timestamp': datetime.utcnow().isoformat()
-        }
+        with STORE_LOCK:
+            processing_status[task_id] = {
+                'status': 'error',
+                'error': str(e),
+                'timestamp': datetime.utcnow().isoformat()
+            }
 
 @app.route('/api/task', methods=['POST'])
 def handle_task():
@@ -125,15 +160,14 @@ def handle_task():
             return jsonify({'error': 'Invalid secret'}), 403
         
         # Log the request
-        print(f"[{datetime.utcnow()}] Received task: {task_data['task']} Round {task_data['round']}")
+        logger.info("Received task: %s Round %s", task_data['task'], task_data['round'])
+        
+        # Make the task visible to /api/status while it waits for a worker
+        with STORE_LOCK:
+            processing_status[task_data['task']] = {'status': 'queued', 'step': 'queued'}
         
         # Start async processing
-        thread = threading.Thread(
-            target=process_task_async,
-            args=(task_data,)
-        )
-        thread.daemon = True
-        thread.start()
+        EXECUTOR.submit(process_task_async, task_data)
         
         # Return immediate 200 response
         return jsonify({
@@ -144,14 +178,16 @@ def handle_task():
         }), 200
         
     except Exception as e:
-        print(f"Error handling task: {str(e)}")
+        logger.error("Error handling task: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/status/<task_id>', methods=['GET'])
 def check_status(task_id):
     """Check processing status of a task"""
-    if task_id in processing_status:
-        return jsonify(processing_status[task_id]), 200
+    with STORE_LOCK:
+        status = processing_status.get(task_id)
+    if status is not None:
+        return jsonify(status), 200
     return jsonify({'error': 'Task not found'}), 404
 
 @app.route('/api/health', methods=['GET'])
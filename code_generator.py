@@ -1,8 +1,186 @@
 import os
+import re
 import json
+import time
 import base64
 from typing import List, Dict
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Matches file marker lines such as "=== index.html ==="
+_FILE_MARKER_RE = re.compile(r'^[ \t]*===[ \t]+(.+?)[ \t]+===[ \t\r]*$', re.MULTILINE)
+
+# Attachment previews show this many characters; enough base64 is decoded
+# to cover them even if every character is 4 bytes of UTF-8
+_PREVIEW_CHARS = 200
+_PREVIEW_B64_LEN = -(-_PREVIEW_CHARS * 4 // 3) * 4
+
+# The request timeout only bounds each read, so a stream that keeps
+# trickling data is also cut off after this many seconds in total
+_STREAM_DEADLINE = 600
+
+_MIT_LICENSE = """MIT License
+
+Copyright (c) 2025
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE."""
+
+_README_TEMPLATE = """# Web Application
+
+## Description
+{brief}
+
+## Features
+This application fulfills the following requirements:
+{checks_str}
+
+## Setup
+1. Clone this repository
+2. Open `index.html` in a web browser
+3. No build process or dependencies required!
+
+## Usage
+Simply open the `index.html` file in your browser. The application is fully self-contained with all necessary CDN resources loaded automatically.
+
+## Code Structure
+- **index.html**: Main application file containing HTML, CSS, and JavaScript
+- All external libraries are loaded via CDN for reliability
+- Modern ES6+ JavaScript is used throughout
+- Responsive design ensures compatibility across devices
+
+## Technologies Used
+- HTML5
+- CSS3
+- JavaScript (ES6+)
+- External libraries as specified in requirements
+
+## License
+This project is licensed under the MIT License - see the LICENSE file for details.
+
+## Generated
+This application was automatically generated based on project requirements."""
+
+# Static instructions shared by every request. Keeping them first and
+# byte-identical lets providers reuse their cached prompt prefix.
+_SYSTEM_PROMPT = """You are an expert web developer who creates clean, functional code. Create a complete, functional single-page web application based on the requirements given after these instructions.
+
+REQUIREMENTS:
+1. Create a single HTML file with embedded CSS and JavaScript
+2. Use CDN links for any libraries (Bootstrap, marked, highlight.js, etc.)
+3. Make the code clean, well-commented, and professional
+4. Ensure ALL checks will pass
+5. If attachments are provided as data URIs, embed them directly in the code or fetch them
+6. The app should be fully functional and production-ready
+7. Handle errors gracefully
+8. Use modern ES6+ JavaScript
+
+OUTPUT FORMAT:
+Provide the complete HTML file content. Start with <!DOCTYPE html> and include everything in a single file.
+After the HTML file, if needed, provide a README.md with:
+- Project title and description
+- Features
+- How to use
+- Code structure explanation
+- Technologies used
+
+Use this format:
+=== index.html ===
+[HTML content here]
+
+=== README.md ===
+[README content here]"""
+
+def _gemini_delta(event: Dict) -> str:
+    """Extract text from a Gemini stream event"""
+    if event.get('error'):
+        raise RuntimeError(f"Gemini stream error: {event['error']}")
+    candidates = event.get('candidates') or [{}]
+    parts = candidates[0].get('content', {}).get('parts', [])
+    return ''.join(part.get('text', '') for part in parts)
+
+def _openai_delta(event: Dict) -> str:
+    """Extract text from an OpenAI stream event"""
+    if event.get('error'):
+        raise RuntimeError(f"OpenAI stream error: {event['error']}")
+    choices = event.get('choices')
+    if not choices:
+        return ''
+    return choices[0].get('delta', {}).get('content') or ''
+
+def _anthropic_delta(event: Dict) -> str:
+    """Extract text from an Anthropic stream event"""
+    if event.get('type') == 'error':
+        raise RuntimeError(f"Anthropic stream error: {event.get('error')}")
+    if event.get('type') == 'content_block_delta':
+        return event['delta'].get('text', '')
+    return ''
+
+# Per-provider endpoint, auth headers, request body builder
+# (prompt, max_tokens, temperature) and stream text extractor
+_PROVIDER_CONFIGS = {
+    'gemini': {
+        # Gemini model via AIPipe
+        'url': "https://aipipe.iitm.ac.in/gemini/v1/models/gemini-1.5-flash:streamGenerateContent?alt=sse",
+        'headers': lambda api_key: {"Authorization": f"Bearer {api_key}"},
+        'build_body': lambda prompt, max_tokens, temperature: {
+            "contents": [
+                {"parts": [{"text": f"{_SYSTEM_PROMPT}\n\n{prompt}"}]}
+            ],
+            "generationConfig": {"maxOutputTokens": max_tokens, "temperature": temperature}
+        },
+        'extract_delta': _gemini_delta
+    },
+    'openai': {
+        'url': "https://api.openai.com/v1/chat/completions",
+        'headers': lambda api_key: {"Authorization": f"Bearer {api_key}"},
+        'build_body': lambda prompt, max_tokens, temperature: {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        },
+        'extract_delta': _openai_delta
+    },
+    'anthropic': {
+        'url': "https://api.anthropic.com/v1/messages",
+        'headers': lambda api_key: {"x-api-key": api_key, "anthropic-version": "2023-06-01"},
+        'build_body': lambda prompt, max_tokens, temperature: {
+            "model": "claude-3-5-sonnet-20241022",
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "system": [
+                {"type": "text", "text": _SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+            ],
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "stream": True
+        },
+        'extract_delta': _anthropic_delta
+    }
+}
 
 class CodeGenerator:
     """Generates code using LLM APIs"""
@@ -11,6 +189,16 @@ class CodeGenerator:
         self.api_key = api_key
         self.provider = provider.lower()
         
+        # Reuse connections to the LLM API across calls
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(max_retries=Retry(total=0), pool_maxsize=20))
+        self.session.headers["Content-Type"] = "application/json"
+        
+        # Provider request shape is resolved once; unsupported providers fail on first call
+        self._config = _PROVIDER_CONFIGS.get(self.provider)
+        if self._config is not None:
+            self.session.headers.update(self._config['headers'](self.api_key))
+        
     def generate_app(self, brief: str, checks: List[str], attachments: List[Dict]) -> Dict[str, str]:
         """
         Generate a complete web application based on brief and checks
@@ -45,31 +233,35 @@ class CodeGenerator:
             
             # Extract data from data URI
             if url.startswith('data:'):
-                # Parse data URI
-                parts = url.split(',', 1)
-                if len(parts) == 2:
-                    mime_info = parts[0]
-                    data = parts[1]
+                # Parse data URI, copying only the prefix needed for the preview
+                comma = url.find(',')
+                if comma != -1:
+                    mime_info = url[:comma]
+                    # Twice the decode length leaves room for line-wrapping whitespace
+                    data = url[comma + 1:comma + 1 + 2 * _PREVIEW_B64_LEN]
                     
                     # Decode if base64
                     if 'base64' in mime_info:
                         try:
-                            decoded = base64.b64decode(data).decode('utf-8', errors='ignore')
-                            info += f"- {name}: {decoded[:200]}...\n"
+                            # Drop wrapping whitespace and decode whole 4-character groups only
+                            b64 = ''.join(data.split())[:_PREVIEW_B64_LEN]
+                            prefix = base64.b64decode(b64[:len(b64) // 4 * 4])
+                            decoded = prefix.decode('utf-8', errors='ignore')
+                            info += f"- {name}: {decoded[:_PREVIEW_CHARS]}...\n"
                         except:
                             info += f"- {name}: [binary data]\n"
                     else:
-                        info += f"- {name}: {data[:200]}...\n"
+                        info += f"- {name}: {data[:_PREVIEW_CHARS]}...\n"
             else:
                 info += f"- {name}: {url}\n"
         
         return info
     
     def _create_prompt(self, brief: str, checks: List[str], attachments_info: str) -> str:
-        """Create the LLM prompt"""
+        """Create the task-specific part of the LLM prompt"""
         checks_str = "\n".join([f"- {check}" for check in checks])
         
-        prompt = f"""You are an expert web developer. Create a complete, functional single-page web application based on the following requirements.
+        prompt = f"""Create the application for the following requirements.
 
 BRIEF:
 {brief}
@@ -79,137 +271,51 @@ CHECKS (These will be tested):
 
 {attachments_info}
 
-REQUIREMENTS:
-1. Create a single HTML file with embedded CSS and JavaScript
-2. Use CDN links for any libraries (Bootstrap, marked, highlight.js, etc.)
-3. Make the code clean, well-commented, and professional
-4. Ensure ALL checks will pass
-5. If attachments are provided as data URIs, embed them directly in the code or fetch them
-6. The app should be fully functional and production-ready
-7. Handle errors gracefully
-8. Use modern ES6+ JavaScript
-
-OUTPUT FORMAT:
-Provide the complete HTML file content. Start with <!DOCTYPE html> and include everything in a single file.
-After the HTML file, if needed, provide a README.md with:
-- Project title and description
-- Features
-- How to use
-- Code structure explanation
-- Technologies used
-
-Use this format:
-=== index.html ===
-[HTML content here]
-
-=== README.md ===
-[README content here]
-
 Now generate the complete application code:"""
         
         return prompt
     
-    def _call_llm(self, prompt: str) -> str:
-        """Call the LLM API"""
-        if self.provider == 'gemini':
-            return self._call_gemini(prompt)
-        elif self.provider == 'openai':
-            return self._call_openai(prompt)
-        elif self.provider == 'anthropic':
-            return self._call_anthropic(prompt)
-        else:
+    def _call_llm(self, prompt: str, max_tokens: int = 8000, temperature: float = 0.3) -> str:
+        """Call the configured LLM API and return the generated text"""
+        if self._config is None:
             raise ValueError(f"Unsupported provider: {self.provider}")
-    
-    def _call_gemini(self, prompt: str) -> str:
-        """Call Gemini model via AIPipe"""
-        url = "https://aipipe.iitm.ac.in/gemini/v1/models/gemini-1.5-flash:generateContent"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        data = {
-            "contents": [
-                {
-                    "parts": [
-                        {
-                            "text": f"You are an expert web developer who creates clean, functional code.\n\n{prompt}"
-                        }
-                    ]
-                }
-            ]
-        }
-
-        response = requests.post(url, headers=headers, json=data, timeout=120)
-        response.raise_for_status()
-        return response.json()['candidates'][0]['content']['parts'][0]['text']
-
-    
-    def _call_openai(self, prompt: str) -> str:
-        """Call OpenAI API"""
-        url = "https://api.openai.com/v1/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        data = {
-            "model": "gpt-4o-mini", 
-            "messages": [
-                {"role": "system", "content": "You are an expert web developer who creates clean, functional code."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.3,
-            "max_tokens": 8000
-        }
         
-        response = requests.post(url, headers=headers, json=data, timeout=120)
-        response.raise_for_status()
-        return response.json()['choices'][0]['message']['content']
+        response = self.session.post(
+            self._config['url'],
+            data=orjson.dumps(self._config['build_body'](prompt, max_tokens, temperature)),
+            timeout=120,
+            stream=True
+        )
+        return self._read_stream(response, self._config['extract_delta'])
     
-    def _call_anthropic(self, prompt: str) -> str:
-        """Call Anthropic Claude API"""
-        url = "https://api.anthropic.com/v1/messages"
-        headers = {
-            "x-api-key": self.api_key,
-            "anthropic-version": "2023-06-01",
-            "Content-Type": "application/json"
-        }
-        data = {
-            "model": "claude-3-5-sonnet-20241022",
-            "max_tokens": 8000,
-            "messages": [
-                {"role": "user", "content": prompt}
-            ]
-        }
+    def _read_stream(self, response, extract_delta) -> str:
+        """Read a server-sent events response and join the text deltas"""
+        chunks = []
+        deadline = time.monotonic() + _STREAM_DEADLINE
+        with response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"LLM response exceeded {_STREAM_DEADLINE}s")
+                # Only data lines carry payloads
+                if not line.startswith(b'data:'):
+                    continue
+                payload = line[5:].strip()
+                if payload == b'[DONE]':
+                    break
+                text = extract_delta(orjson.loads(payload))
+                if text:
+                    chunks.append(text)
         
-        response = requests.post(url, headers=headers, json=data, timeout=120)
-        response.raise_for_status()
-        return response.json()['content'][0]['text']
+        if not chunks:
+            raise RuntimeError("LLM returned an empty response")
+        return ''.join(chunks)
     
     def _parse_response(self, response: str, attachments: List[Dict]) -> Dict[str, str]:
         """Parse LLM response and extract files"""
-        files = {}
-        
-        # Look for file markers
-        lines = response.split('\n')
-        current_file = None
-        current_content = []
-        
-        for line in lines:
-            # Check for file markers
-            if line.strip().startswith('=== ') and line.strip().endswith(' ==='):
-                # Save previous file
-                if current_file:
-                    files[current_file] = '\n'.join(current_content).strip()
-                
-                # Start new file
-                current_file = line.strip().replace('=== ', '').replace(' ===', '').strip()
-                current_content = []
-            elif current_file:
-                current_content.append(line)
-        
-        # Save last file
-        if current_file:
-            files[current_file] = '\n'.join(current_content).strip()
+        # Split on file markers: [preamble, name1, body1, name2, body2, ...]
+        parts = _FILE_MARKER_RE.split(response)
+        files = {parts[i]: parts[i + 1].strip() for i in range(1, len(parts), 2)}
         
         # If no files found, assume entire response is index.html
         if not files:
@@ -230,12 +336,12 @@ Now generate the complete application code:"""
 </body>
 </html>"""
         
-        # Save attachments as separate files
+        # Save data URI attachments as reference files
         for att in attachments:
             name = att.get('name', '')
             url = att.get('url', '')
             if name and url.startswith('data:'):
-                files[name] = url  # Store data URI directly
+                files[f"attachments/{name}.txt"] = f"# {name}\n\nThis file was provided as an attachment.\nData URI: {url[:100]}..."
         
         return files
     
@@ -244,27 +350,7 @@ Now generate the complete application code:"""
         
         # Add MIT LICENSE
         if 'LICENSE' not in files and 'LICENSE.md' not in files:
-            files['LICENSE'] = """MIT License
-
-Copyright (c) 2025
-
-Permission is hereby granted, free of charge, to any person obtaining a copy
-of this software and associated documentation files (the "Software"), to deal
-in the Software without restriction, including without limitation the rights
-to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
-copies of the Software, and to permit persons to whom the Software is
-furnished to do so, subject to the following conditions:
-
-The above copyright notice and this permission notice shall be included in all
-copies or substantial portions of the Software.
-
-THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
-IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
-FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
-AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
-LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
-OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
-SOFTWARE."""
+            files['LICENSE'] = _MIT_LICENSE
         
         # Add README if missing
         if 'README.md' not in files:
@@ -276,39 +362,4 @@ SOFTWARE."""
         """Generate a professional README"""
         checks_str = "\n".join([f"- {check}" for check in checks])
         
-        return f"""# Web Application
-
-## Description
-{brief}
-
-## Features
-This application fulfills the following requirements:
-{checks_str}
-
-## Setup
-1. Clone this repository
-2. Open `index.html` in a web browser
-3. No build process or dependencies required!
-
-## Usage
-Simply open the `index.html` file in your browser. The application is fully self-contained with all necessary CDN resources loaded automatically.
-
-## Code Structure
-- **index.html**: Main application file containing HTML, CSS, and JavaScript
-- All external libraries are loaded via CDN for reliability
-- Modern ES6+ JavaScript is used throughout
-- Responsive design ensures compatibility across devices
-
-## Technologies Used
-- HTML5
-- CSS3
-- JavaScript (ES6+)
-- External libraries as specified in requirements
-
-## License
-This project is licensed under the MIT License - see the LICENSE file for details.
-
-## Generated
-This application was automatically generated based on project requirements."""
-        
-        return
+        return _README_TEMPLATE.format(brief=brief, checks_str=checks_str)
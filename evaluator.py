@@ -0,0 +1,67 @@
+import time
+import logging
+from typing import Dict, Optional
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Shared session so repeated submissions reuse warm connections.
+# Retries on 5xx responses are handled by urllib3, which backs off
+# 0, 2, 4, 8 and 16s (the first retry is immediate).
+_RETRY = Retry(
+    total=5,
+    backoff_factor=1,
+    status_forcelist=(500, 502, 503, 504),
+    allowed_methods=frozenset(["GET", "POST"]),
+    raise_on_status=False
+)
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(max_retries=_RETRY, pool_connections=10, pool_maxsize=20)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
+def submit_to_evaluation(url: str, data: Dict, session: Optional[requests.Session] = None) -> bool:
+    """
+    Submit repo details to the evaluation API, using the shared session unless one is given
+    Returns: True if the evaluation API accepted the submission
+    """
+    session = session or _SESSION
+    try:
+        logger.info("Submitting to evaluation API: %s", url)
+        logger.debug("Data: %s", data)
+
+        response = session.post(
+            url,
+            data=orjson.dumps(data),
+            headers={"Content-Type": "application/json"},
+            timeout=30
+        )
+
+        if response.status_code == 200:
+            logger.info("Successfully submitted to evaluation API")
+            return True
+
+        logger.warning("Evaluation API returned %s: %s", response.status_code, response.text)
+
+    except requests.RequestException as e:
+        logger.error("Error submitting to evaluation API: %s", e)
+
+    return False
+
+def verify_pages_accessible(pages_url: str, max_attempts: int = 10, delay: int = 5) -> bool:
+    """Poll the GitHub Pages URL until it responds with 200"""
+    for attempt in range(max_attempts):
+        try:
+            response = _SESSION.get(pages_url, timeout=10)
+            if response.status_code == 200:
+                return True
+        except requests.RequestException:
+            pass  # Pages might still be deploying
+
+        if attempt < max_attempts - 1:
+            time.sleep(delay)
+
+    return False
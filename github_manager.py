@@ -1,15 +1,71 @@
-from github import Github, GithubException
+from github import Github, GithubException, InputGitTreeElement
+from cachetools import LRUCache
+import logging
+import threading
 import time
 import base64
-from typing import Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Blob uploads are independent, so a few can run at once. They go through
+# a plain requests session because PyGithub's Requester is not thread-safe.
+BLOB_UPLOAD_WORKERS = 8
+
+# Repositories kept per thread for later rounds of the same task
+REPO_CACHE_SIZE = 128
+
+# Blobs are content-addressed, so retrying a failed POST is safe
+_BLOB_RETRY = Retry(
+    total=3,
+    backoff_factor=1,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(["POST"]),
+    raise_on_status=False
+)
 
 class GitHubManager:
     """Manages GitHub repository creation and updates"""
     
     def __init__(self, token: str, username: str):
-        self.github = Github(token)
-        self.user = self.github.get_user()
+        self.token = token
         self.username = username
+        # PyGithub's Requester is not thread-safe, so each thread gets its own
+        # client, and cached Repository objects stay with the client that made them
+        self._local = threading.local()
+        self._blob_session = requests.Session()
+        # Sized for a few tasks uploading BLOB_UPLOAD_WORKERS blobs each at once
+        self._blob_session.mount("https://", HTTPAdapter(max_retries=_BLOB_RETRY, pool_maxsize=20))
+        self._blob_session.headers["Authorization"] = f"token {token}"
+        self._blob_session.headers["Accept"] = "application/vnd.github+json"
+    
+    def _thread_state(self) -> threading.local:
+        """Github client and repository cache for the calling thread"""
+        state = self._local
+        if not hasattr(state, 'github'):
+            state.github = Github(self.token)
+            # repo_name -> Repository, revalidated via ETag; only touched by this thread
+            state.repo_cache = LRUCache(maxsize=REPO_CACHE_SIZE)
+        return state
+    
+    @property
+    def github(self) -> Github:
+        """Github client for the calling thread"""
+        return self._thread_state().github
+    
+    @property
+    def user(self):
+        """Authenticated user for the calling thread's client (lazy, no request)"""
+        return self.github.get_user()
+    
+    @property
+    def _repo_cache(self) -> Dict:
+        """Repository cache for the calling thread's client"""
+        return self._thread_state().repo_cache
         
     def create_repo(self, repo_name: str, files: Dict[str, str], 
                     description: str = "") -> Tuple[str, str, str]:
@@ -26,7 +82,8 @@ class GitHubManager:
                 auto_init=False
             )
             
-            print(f"Created repo: {repo.html_url}")
+            logger.info("Created repo: %s", repo.html_url)
+            self._repo_cache[repo_name] = repo
             
             # Wait a moment for repo to be ready
             time.sleep(2)
@@ -45,7 +102,7 @@ class GitHubManager:
         except GithubException as e:
             # If repo exists, update it instead
             if e.status == 422:
-                print(f"Repo {repo_name} exists, updating instead...")
+                logger.info("Repo %s exists, updating instead...", repo_name)
                 return self.update_repo(repo_name, files)
             raise
     
@@ -55,53 +112,72 @@ class GitHubManager:
         Returns: (repo_url, commit_sha, pages_url)
         """
         try:
-            repo = self.user.get_repo(repo_name)
+            repo = self._get_repo(repo_name)
             
-            # Update each file
-            for filename, content in files.items():
-                self._update_or_create_file(repo, filename, content)
+            # Current head of main becomes the parent of the update commit
+            try:
+                ref = repo.get_git_ref("heads/main")
+            except GithubException as e:
+                # Empty repo (e.g. an earlier round failed after creating it)
+                if e.status not in (404, 409):
+                    raise
+                ref = None
             
-            # Get latest commit
-            commits = repo.get_commits()
-            latest_commit = commits[0].sha
+            if ref is None:
+                latest_commit = self._create_initial_commit(repo, files)
+            else:
+                parent = repo.get_git_commit(ref.object.sha)
+                
+                # Commit all files at once on top of the existing tree
+                elements = self._build_tree_elements(repo, files)
+                tree = repo.create_git_tree(elements, base_tree=parent.tree)
+                commit = repo.create_git_commit(
+                    message="Update - Auto-generated application",
+                    tree=tree,
+                    parents=[parent]
+                )
+                ref.edit(commit.sha)
+                latest_commit = commit.sha
             
             # Get pages URL
             pages_url = f"https://{self.username}.github.io/{repo_name}/"
             
-            # Ensure pages is enabled
-            try:
-                self._enable_pages(repo)
-            except:
-                pass  # Pages might already be enabled
+            # Ensure pages is enabled, skipping the request when it already is
+            if not repo.has_pages:
+                try:
+                    self._enable_pages(repo)
+                except:
+                    pass  # Pages might already be enabled
             
             return repo.html_url, latest_commit, pages_url
             
         except GithubException as e:
-            print(f"Error updating repo: {e}")
+            logger.error("Error updating repo: %s", e)
             raise
     
+    def _get_repo(self, repo_name: str):
+        """Get a repository, revalidating a cached copy with a conditional request"""
+        repo = self._repo_cache.get(repo_name)
+        if repo is None:
+            # Address the repo by the configured owner; self.user.get_repo would
+            # first fetch /user just to learn the login
+            repo = self.github.get_repo(f"{self.username}/{repo_name}")
+            self._repo_cache[repo_name] = repo
+            return repo
+        
+        # Sends If-None-Match with the stored ETag; a 304 keeps the cached
+        # data and does not count against the rate limit
+        try:
+            repo.update()
+        except GithubException:
+            self._repo_cache.pop(repo_name, None)
+            raise
+        return repo
+    
     def _create_initial_commit(self, repo, files: Dict[str, str]) -> str:
         """Create initial commit with multiple files"""
         # Prepare all files for commit
-        elements = []
-        
-        for filename, content in files.items():
-            # Handle data URIs for attachments
-            if content.startswith('data:'):
-                # For data URIs, create a reference file instead
-                content = f"# {filename}\n\nThis file was provided as an attachment.\nData URI: {content[:100]}..."
-                filename = f"attachments/{filename}.txt"
-            
-            # Create blob
-            blob = repo.create_git_blob(content, "utf-8")
-            elements.append(
-                {
-                    "path": filename,
-                    "mode": "100644",
-                    "type": "blob",
-                    "sha": blob.sha
-                }
-            )
+        elements = self._build_tree_elements(repo, files)
         
         # Create tree
         tree = repo.create_git_tree(elements)
@@ -113,65 +189,44 @@ class GitHubManager:
             parents=[]
         )
         
-        # Update main/master branch reference
-        try:
-            ref = repo.get_git_ref("heads/main")
-            ref.edit(commit.sha)
-        except:
-            # Create main branch if doesn't exist
-            repo.create_git_ref("refs/heads/main", commit.sha)
+        # The repo was just created without auto_init, so main doesn't exist yet
+        repo.create_git_ref("refs/heads/main", commit.sha)
         
         return commit.sha
     
-    def _update_or_create_file(self, repo, filename: str, content: str):
-        """Update a file if it exists, create if it doesn't"""
-        try:
-            # Handle data URIs
-            if content.startswith('data:'):
-                content = f"# {filename}\n\nThis file was provided as an attachment.\nData URI: {content[:100]}..."
-                filename = f"attachments/{filename}.txt"
-            
-            # Try to get existing file
-            try:
-                file_contents = repo.get_contents(filename)
-                # Update existing file
-                repo.update_file(
-                    path=filename,
-                    message=f"Update {filename}",
-                    content=content,
-                    sha=file_contents.sha,
-                    branch="main"
-                )
-                print(f"Updated: {filename}")
-            except GithubException as e:
-                if e.status == 404:
-                    # File doesn't exist, create it
-                    repo.create_file(
-                        path=filename,
-                        message=f"Add {filename}",
-                        content=content,
-                        branch="main"
-                    )
-                    print(f"Created: {filename}")
-                else:
-                    raise
-                    
-        except Exception as e:
-            print(f"Error updating {filename}: {e}")
-            raise
+    def _build_tree_elements(self, repo, files: Dict[str, str]) -> List[InputGitTreeElement]:
+        """Upload files as blobs and return the tree entries pointing to them"""
+        # Create blobs concurrently
+        with ThreadPoolExecutor(max_workers=BLOB_UPLOAD_WORKERS) as executor:
+            shas = list(executor.map(lambda content: self._create_blob(repo, content), files.values()))
+        
+        return [
+            InputGitTreeElement(path=filename, mode="100644", type="blob", sha=sha)
+            for filename, sha in zip(files, shas)
+        ]
+    
+    def _create_blob(self, repo, content: str) -> str:
+        """Create a blob via the REST API and return its SHA (safe to call from worker threads)"""
+        response = self._blob_session.post(
+            f"{repo.url}/git/blobs",
+            json={"content": content, "encoding": "utf-8"},
+            timeout=30
+        )
+        response.raise_for_status()
+        return response.json()['sha']
     
     def _enable_pages(self, repo) -> str:
         """Enable GitHub Pages for the repository"""
         try:
             # Try to enable pages
             repo.create_pages_site(source={"branch": "main", "path": "/"})
-            print(f"Enabled GitHub Pages")
+            logger.info("Enabled GitHub Pages for %s", repo.name)
         except GithubException as e:
             if e.status == 409:
                 # Pages already enabled
-                print("GitHub Pages already enabled")
+                logger.info("GitHub Pages already enabled for %s", repo.name)
             else:
-                print(f"Error enabling pages: {e}")
+                logger.warning("Error enabling pages: %s", e)
         
         # Return pages URL
         pages_url = f"https://{self.username}.github.io/{repo.name}/"
@@ -181,7 +236,7 @@ class GitHubManager:
         """Verify that a repo is accessible"""
         try:
             repo_name = repo_url.split('/')[-1]
-            repo = self.user.get_repo(repo_name)
+            repo = self._get_repo(repo_name)
             return True
         except:
             return False